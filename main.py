@@ -1,12 +1,25 @@
-import json
+import asyncio
+import dataclasses
+import hashlib
+import heapq
+import hmac
 import os
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
+import orjson
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastmcp import FastMCP
 from loguru import logger
 
@@ -14,14 +27,39 @@ load_dotenv()
 
 logger.remove()
 logger.add(
-    sink=lambda msg: print(msg, end=""),
+    sink=sys.stdout,
     level=os.getenv("LOG_LEVEL", "INFO"),
     format="{time:DD-MM-YYYY at HH:mm:ss} | {level: <8} | {message}",
+    enqueue=True,  # format and write on loguru's worker thread, off the request path
 )
 
-API_KEYS = set(key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip())
+# Pre-encoded for hmac.compare_digest; header values arrive latin-1 decoded, so they are re-encoded the same way
+API_KEYS = frozenset(key.strip().encode() for key in os.getenv("API_KEYS", "").split(",") if key.strip())
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
 DATA_DIR = Path(__file__).parent / "data"
+MCP_PREFIX = "/mcp"
+MCP_ACCEPT = b"application/json, text/event-stream"
+PUBLIC_PATHS = frozenset({"/health"})  # served without an API key
 DATA: dict[str, list] = {}
+DATA_FILES = {
+    "best_practices": "best_practices.json",
+    "snippets": "snippets.json",
+    "troubleshooting": "troubleshooting.json",
+    "tips": "tips.json",
+    "governance": "governance.json",
+}
+SEARCH_INDEX: dict[str, "SearchIndex"] = {}
+FILTER_INDEX: dict[str, dict[str, dict[str, list]]] = {}  # collection -> field -> value -> items, in corpus order
+BY_ID: dict[str, dict[str, dict]] = {}
+ID_COLLECTIONS = ("best_practices", "snippets", "troubleshooting", "tips")
+GOVERNANCE_BY_FEATURE: dict[str, dict] = {}
+# Sorted (key, (tier, position), item) over features (tier 0) and lowered display names (tier 1)
+GOVERNANCE_PREFIX: list[tuple[str, tuple[int, int], dict]] = []
+GOVERNANCE_KEYS: list[tuple[str, str, dict]] = []  # (normalized feature, lowered display name, item)
+CACHED_FUNCTIONS: list = []
+FORMATTED: dict[str, dict[str, str]] = {}
+ETAGS: dict[str, dict[str, str]] = {}
+HEALTH_BYTES = orjson.dumps({"status": "healthy", "data_loaded": False})
 
 
 # ---------------------------------------------------------------------------
@@ -29,11 +67,12 @@ DATA: dict[str, list] = {}
 # ---------------------------------------------------------------------------
 
 
+@lru_cache(maxsize=16)
 def load_json(filename: str) -> list | dict:
+    """Parse a data file. Memoized: the files are static and callers never mutate the parsed data."""
     filepath = DATA_DIR / filename
     if filepath.exists():
-        with open(filepath) as f:
-            return json.load(f)
+        return orjson.loads(filepath.read_bytes())
     logger.warning(f"Data file not found: {filepath}")
     return []
 
@@ -43,34 +82,189 @@ def load_json(filename: str) -> list | dict:
 # ---------------------------------------------------------------------------
 
 
-def search_items(items: list, query: str, fields: list[str]) -> list:
+SEARCH_FIELDS: dict[str, list[str]] = {
+    "best_practices": ["title", "description", "tags", "rationale"],
+    "snippets": ["title", "description", "tags", "use_case"],
+    "troubleshooting": ["title", "symptoms", "causes", "tags"],
+}
+FILTER_FIELDS: dict[str, tuple[str, ...]] = {
+    "best_practices": ("category", "difficulty"),
+    "snippets": ("language",),
+    "troubleshooting": ("category",),
+    "tips": ("category",),
+}
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(slots=True)
+class SearchIndex:
+    """Precomputed search tables for one collection; keys are item ids (or positions, for tips)."""
+
+    blobs: dict  # key -> lowered searchable text
+    postings: dict[str, set]  # token -> keys whose blob contains it
+    suffixes: list[tuple[str, str]]  # sorted (suffix, token) over every suffix of every token
+    token_keys: dict[str, frozenset] = dataclasses.field(default_factory=dict)  # memoized query token -> candidate keys
+
+
+TOKEN_CACHE_SIZE = 4096
+
+
+def build_search_index(keyed_blobs) -> SearchIndex:
+    """Index lowered `(key, blob)` pairs by alphanumeric token, plus a suffix array over the tokens."""
+    blobs = dict(keyed_blobs)
+    postings = defaultdict(set)
+    for key, blob in blobs.items():
+        for token in TOKEN_RE.findall(blob):
+            postings[token].add(key)
+    suffixes = sorted((token[i:], token) for token in postings for i in range(len(token)))
+    return SearchIndex(blobs, dict(postings), suffixes)
+
+
+def token_candidates(index: SearchIndex, query_token: str) -> frozenset:
+    """Keys of every blob with a token containing `query_token`."""
+    suffixes = index.suffixes
+    tokens = set()
+    i = bisect_left(suffixes, (query_token,))
+    while i < len(suffixes) and suffixes[i][0].startswith(query_token):
+        tokens.add(suffixes[i][1])
+        i += 1
+    return frozenset().union(*(index.postings[token] for token in tokens))
+
+
+def index_candidates(index: SearchIndex, query_lower: str) -> frozenset | None:
+    """Keys whose blob may contain `query_lower` as a substring, or None if the query has no tokens.
+
+    Every token of the query must sit inside some token of a matching blob, i.e. be a prefix of one of
+    its suffixes — a binary search in `index.suffixes`. The result is a superset of the true matches:
+    callers still confirm with a substring check, but only on the candidates.
+    """
+    candidates = None
+    for query_token in set(TOKEN_RE.findall(query_lower)):
+        keys = index.token_keys.get(query_token)
+        if keys is None:
+            keys = token_candidates(index, query_token)
+            if len(index.token_keys) < TOKEN_CACHE_SIZE:
+                index.token_keys[query_token] = keys
+        candidates = keys if candidates is None else candidates & keys
+        if not candidates:
+            return frozenset()
+    return candidates
+
+
+def search_blob(item: dict, fields: list[str]) -> str:
+    """Lowered searchable text of an item; values are joined with \\x1f so a query never spans two of them."""
+    values = []
+    for field in fields:
+        value = item.get(field, "")
+        if isinstance(value, str):
+            values.append(value)
+        elif isinstance(value, list):
+            values.extend(v for v in value if isinstance(v, str))
+    return "\x1f".join(values).lower()
+
+
+def search_items(items: list, query: str, fields: list[str], index: SearchIndex | None = None) -> list:
+    """Rank items by how often the query occurs in their searchable fields.
+
+    `index` is the collection's SearchIndex keyed by item id: only its candidates are scored, using their
+    precomputed blobs. Without it, every item is blobbed on the fly.
+    """
     if not query:
         return items[:10]
+    if not fields:
+        return []
     query_lower = query.lower()
-    results = []
+    candidates = index_candidates(index, query_lower) if index is not None else None
+    blobs = index.blobs if index is not None else {}
+    scores = array("i")
+    hits = []
     for item in items:
-        score = 0
-        for field in fields:
-            value = item.get(field, "")
-            if isinstance(value, str) and query_lower in value.lower():
-                score += 1
-            elif isinstance(value, list):
-                for v in value:
-                    if isinstance(v, str) and query_lower in v.lower():
-                        score += 1
-        if score > 0:
-            results.append((score, item))
-    results.sort(key=lambda x: x[0], reverse=True)
-    return [item for _, item in results[:10]]
-
-
-def find_by_id(items: list, item_id: str) -> dict | None:
+        if candidates is not None and item.get("id") not in candidates:
+            continue
+        blob = blobs.get(item.get("id"))
+        if blob is None:
+            blob = search_blob(item, fields)
+        score = blob.count(query_lower)
+        if score:
+            scores.append(score)
+            hits.append(item)
+    return [hits[i] for i in heapq.nlargest(10, range(len(scores)), key=scores.__getitem__)]
+
+
+def filter_items(name: str, **filters: str | None) -> list:
+    """Items of collection `name` whose fields equal every non-empty filter value, via FILTER_INDEX.
+
+    The returned list may be the shared index list itself: callers must not mutate it.
+    """
+    active = [(field, value) for field, value in filters.items() if value]
+    if not active:
+        return DATA.get(name, [])
+    index = FILTER_INDEX.get(name, {})
+    items = min((index.get(field, {}).get(value, []) for field, value in active), key=len)
+    if len(active) == 1:
+        return items
+    return [i for i in items if all(i.get(field) == value for field, value in active)]
+
+
+def find_by_id(items: list, item_id: str, by_id: dict[str, dict] | None = None) -> dict | None:
+    """Look up an item by id, via the prebuilt `by_id` map when given, else by scanning `items`."""
+    if by_id is not None:
+        return by_id.get(item_id)
     for item in items:
         if item.get("id") == item_id:
             return item
     return None
 
 
+FEATURE_SEPARATORS = str.maketrans(" _", "--")
+
+
+def normalize_feature(feature: str) -> str:
+    return feature.lower().translate(FEATURE_SEPARATORS)
+
+
+def find_governance(feature: str) -> dict | None:
+    """Resolve a governance entry: exact feature, then prefix of feature/display name, then substring.
+
+    The substring fallback only checks candidates from the token index, in corpus order.
+    """
+    feature_lower = normalize_feature(feature)
+    item = GOVERNANCE_BY_FEATURE.get(feature_lower)
+    if item:
+        return item
+    best = None
+    i = bisect_left(GOVERNANCE_PREFIX, (feature_lower,))
+    while i < len(GOVERNANCE_PREFIX) and GOVERNANCE_PREFIX[i][0].startswith(feature_lower):
+        if best is None or GOVERNANCE_PREFIX[i][1] < best[1]:
+            best = GOVERNANCE_PREFIX[i]
+        i += 1
+    if best:
+        return best[2]
+    index = SEARCH_INDEX.get("governance")
+    candidates = index_candidates(index, feature_lower) if index is not None else None
+    positions = range(len(GOVERNANCE_KEYS)) if candidates is None else sorted(candidates)
+    for pos in positions:
+        if feature_lower in GOVERNANCE_KEYS[pos][0]:
+            return GOVERNANCE_KEYS[pos][2]
+    for pos in positions:
+        if feature_lower in GOVERNANCE_KEYS[pos][1]:
+            return GOVERNANCE_KEYS[pos][2]
+    return None
+
+
+def find_tips(feature_lower: str) -> list[dict]:
+    """Tips whose category, title or tags contain `feature_lower`, in corpus order."""
+    index = SEARCH_INDEX.get("tips")
+    if index is None:
+        return []
+    candidates = index_candidates(index, feature_lower)
+    positions = range(len(index.blobs)) if candidates is None else sorted(candidates)
+    tips = DATA.get("tips", [])
+    return [tips[i] for i in positions if feature_lower in index.blobs[i]]
+
+
 # ---------------------------------------------------------------------------
 # Format helpers (for MCP resources — full detail)
 # ---------------------------------------------------------------------------
@@ -149,10 +343,85 @@ def format_governance_full(item: dict) -> str:
     return "\n".join(lines)
 
 
+# ---------------------------------------------------------------------------
+# Indexes (derived from DATA once per load, never per request)
+# ---------------------------------------------------------------------------
+
+
+def cached(func):
+    """Memoize a result builder derived from DATA; build_indexes() clears it on every reload."""
+    func = lru_cache(maxsize=1024)(func)
+    CACHED_FUNCTIONS.append(func)
+    return func
+
+
+FORMATTERS = {
+    "best_practices": format_best_practice_full,
+    "snippets": format_snippet_full,
+    "troubleshooting": format_troubleshooting_full,
+    "tips": format_tip_full,
+}
+
+
+def etag(body: bytes) -> str:
+    """Weak validator: GZipMiddleware may re-encode the body, and a strong tag must differ per content coding."""
+    return f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def build_indexes() -> None:
+    """Rebuild all lookup structures from DATA. Call after every (re)load of DATA."""
+    global HEALTH_BYTES
+    for name, fields in SEARCH_FIELDS.items():
+        SEARCH_INDEX[name] = build_search_index(
+            (item["id"], search_blob(item, fields)) for item in DATA.get(name, []) if "id" in item
+        )
+    for name, fields in FILTER_FIELDS.items():
+        FILTER_INDEX[name] = {field: {} for field in fields}
+        for item in DATA.get(name, []):
+            for field in fields:
+                if field in item:
+                    FILTER_INDEX[name][field].setdefault(item[field], []).append(item)
+    for name in ID_COLLECTIONS:
+        BY_ID[name] = {item["id"]: item for item in DATA.get(name, []) if "id" in item}
+        FORMATTED[name] = {item_id: FORMATTERS[name](item) for item_id, item in BY_ID[name].items()}
+        ETAGS[name] = {item_id: etag(orjson.dumps(item)) for item_id, item in BY_ID[name].items()}
+    GOVERNANCE_KEYS[:] = [
+        (normalize_feature(item.get("feature", "")), item.get("display_name", "").lower(), item)
+        for item in DATA.get("governance", [])
+    ]
+    GOVERNANCE_BY_FEATURE.clear()
+    for feature_key, _, item in reversed(GOVERNANCE_KEYS):  # first entry wins on duplicate keys
+        GOVERNANCE_BY_FEATURE[feature_key] = item
+    FORMATTED["governance"] = {key: format_governance_full(item) for key, item in GOVERNANCE_BY_FEATURE.items()}
+    GOVERNANCE_PREFIX[:] = sorted(
+        [(feature_key, (0, pos), item) for pos, (feature_key, _, item) in enumerate(GOVERNANCE_KEYS)]
+        + [(display_lower, (1, pos), item) for pos, (_, display_lower, item) in enumerate(GOVERNANCE_KEYS)]
+    )
+    SEARCH_INDEX["governance"] = build_search_index(
+        (pos, f"{feature_key}\x1f{display_lower}")
+        for pos, (feature_key, display_lower, _) in enumerate(GOVERNANCE_KEYS)
+    )
+    SEARCH_INDEX["tips"] = build_search_index(
+        (pos, "\x1f".join([t.get("category", ""), t.get("title", ""), " ".join(t.get("tags", []))]).lower())
+        for pos, t in enumerate(DATA.get("tips", []))
+    )
+    HEALTH_BYTES = orjson.dumps({"status": "healthy", "data_loaded": bool(DATA)})
+    for func in CACHED_FUNCTIONS:
+        func.cache_clear()
+
+
 # ---------------------------------------------------------------------------
 # FastAPI app (lifespan composed with MCP app lifespan)
 # ---------------------------------------------------------------------------
 
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse serialized with orjson instead of stdlib json."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
 # MCP server defined later, but we need a forward reference for the ASGI app
 # to compose lifespans. We'll set it up after MCP tools/resources are registered.
 _mcp_asgi_app = None
@@ -160,11 +429,11 @@ _mcp_asgi_app = None
 
 @asynccontextmanager
 async def lifespan(fastapi_app: FastAPI):
-    DATA["best_practices"] = load_json("best_practices.json")
-    DATA["snippets"] = load_json("snippets.json")
-    DATA["troubleshooting"] = load_json("troubleshooting.json")
-    DATA["tips"] = load_json("tips.json")
-    DATA["governance"] = load_json("governance.json")
+    results = await asyncio.gather(*(asyncio.to_thread(load_json, filename) for filename in DATA_FILES.values()))
+    DATA.update(zip(DATA_FILES, results))
+    build_indexes()
+    if not API_KEYS:
+        logger.warning("API_KEYS is empty — authentication is disabled (dev mode)")
     logger.info(
         f"Loaded: {len(DATA['best_practices'])} best practices, "
         f"{len(DATA['snippets'])} snippets, {len(DATA['troubleshooting'])} troubleshooting, "
@@ -180,48 +449,57 @@ app = FastAPI(
     description="Curated Copilot Studio best practices API + MCP server",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["X-API-Key", "Content-Type", "Accept", "Mcp-Session-Id", "Mcp-Protocol-Version"],
 )
+# Starlette never compresses text/event-stream, so MCP streaming responses are left alone
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
 
 
 @app.middleware("http")
 async def mcp_accept_middleware(request: Request, call_next):
     """Inject Accept header for MCP POST requests if missing — Azure API Hub strips it."""
-    if request.url.path.startswith("/mcp") and request.method == "POST":
-        accept = request.headers.get("accept", "")
-        if "text/event-stream" not in accept:
-            headers = dict(request.scope["headers"])
-            headers[b"accept"] = b"application/json, text/event-stream"
-            request.scope["headers"] = list(headers.items())
+    if request.method == "POST" and request.scope["path"].startswith(MCP_PREFIX):
+        headers = request.scope["headers"]  # may be a tuple: replace it with a new list, never mutate in place
+        for i, (name, value) in enumerate(headers):
+            if name == b"accept":
+                if b"text/event-stream" not in value:
+                    request.scope["headers"] = [*headers[:i], (b"accept", MCP_ACCEPT), *headers[i + 1 :]]
+                break
+        else:
+            request.scope["headers"] = [*headers, (b"accept", MCP_ACCEPT)]
     return await call_next(request)
 
 
 @app.middleware("http")
 async def auth_middleware(request: Request, call_next):
-    if request.url.path == "/health" or request.method == "OPTIONS":
+    path = request.scope["path"]
+    if path in PUBLIC_PATHS or request.method == "OPTIONS":
         return await call_next(request)
-    if request.url.path.startswith("/mcp") and request.method == "GET":
+    if request.method == "GET" and path.startswith(MCP_PREFIX):
         return JSONResponse({"status": "ok", "server": "MCS Best Practices MCP", "protocol": "mcp-streamable-1.0"})
-    api_key = request.headers.get("X-API-Key")
-    if not api_key or api_key not in API_KEYS:
+    if not API_KEYS:
+        return await call_next(request)  # dev mode: no keys configured
+    api_key = request.headers.get("X-API-Key", "").encode("latin-1")
+    if not api_key or not any(hmac.compare_digest(api_key, key) for key in API_KEYS):
         return JSONResponse(status_code=401, content={"detail": "Invalid or missing API key"})
     return await call_next(request)
 
 
 # ---------------------------------------------------------------------------
-# Health check (no auth — middleware skips /health)
+# Health check (no auth — /health is in PUBLIC_PATHS)
 # ---------------------------------------------------------------------------
 
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "data_loaded": bool(DATA)}
+    return Response(HEALTH_BYTES, media_type="application/json")
 
 
 # ---------------------------------------------------------------------------
@@ -229,84 +507,100 @@ async def health():
 # ---------------------------------------------------------------------------
 
 
+def item_response(request: Request, name: str, item_id: str):
+    """Detail response with an ETag; 304 when the client's If-None-Match already has it."""
+    item = find_by_id(DATA.get(name, []), item_id, BY_ID.get(name))
+    if not item:
+        raise HTTPException(status_code=404, detail="Not found")
+    tag = ETAGS.get(name, {}).get(item_id)
+    if not tag:
+        return item
+    if_none_match = {t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")}
+    if tag.removeprefix("W/") in if_none_match or "*" in if_none_match:
+        return Response(status_code=304, headers={"ETag": tag, "Vary": "Accept-Encoding"})
+    return ORJSONResponse(item, headers={"ETag": tag})
+
+
+@cached
+def _list_best_practices(q: str, category: str | None, difficulty: str | None) -> bytes:
+    items = filter_items("best_practices", category=category, difficulty=difficulty)
+    if q:
+        items = search_items(
+            items,
+            q,
+            SEARCH_FIELDS["best_practices"],
+            SEARCH_INDEX.get("best_practices"),
+        )
+    return orjson.dumps({"results": items[:10], "total": len(items)})
+
+
 @app.get("/api/v1/best-practices")
 async def list_best_practices(
     q: str | None = None,
     category: str | None = None,
     difficulty: str | None = None,
 ):
-    items = DATA.get("best_practices", [])
-    if category:
-        items = [i for i in items if i.get("category") == category]
-    if difficulty:
-        items = [i for i in items if i.get("difficulty") == difficulty]
-    if q:
-        items = search_items(items, q, ["title", "description", "tags", "rationale"])
-    return {"results": items[:10], "total": len(items)}
+    return Response(_list_best_practices((q or "").lower(), category, difficulty), media_type="application/json")
 
 
 @app.get("/api/v1/best-practices/{id}")
-async def get_best_practice(id: str):
-    item = find_by_id(DATA.get("best_practices", []), id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Not found")
-    return item
+async def get_best_practice(id: str, request: Request):
+    return item_response(request, "best_practices", id)
+
+
+@cached
+def _list_snippets(q: str, language: str | None) -> bytes:
+    items = filter_items("snippets", language=language if language != "any" else None)
+    if q:
+        items = search_items(items, q, SEARCH_FIELDS["snippets"], SEARCH_INDEX.get("snippets"))
+    return orjson.dumps({"results": items[:10], "total": len(items)})
 
 
 @app.get("/api/v1/snippets")
 async def list_snippets(q: str | None = None, language: str | None = None):
-    items = DATA.get("snippets", [])
-    if language and language != "any":
-        items = [i for i in items if i.get("language") == language]
-    if q:
-        items = search_items(items, q, ["title", "description", "tags", "use_case"])
-    return {"results": items[:10], "total": len(items)}
+    return Response(_list_snippets((q or "").lower(), language), media_type="application/json")
 
 
 @app.get("/api/v1/snippets/{id}")
-async def get_snippet(id: str):
-    item = find_by_id(DATA.get("snippets", []), id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Not found")
-    return item
+async def get_snippet(id: str, request: Request):
+    return item_response(request, "snippets", id)
+
+
+@cached
+def _list_troubleshooting(q: str, category: str | None) -> bytes:
+    items = filter_items("troubleshooting", category=category)
+    if q:
+        items = search_items(
+            items,
+            q,
+            SEARCH_FIELDS["troubleshooting"],
+            SEARCH_INDEX.get("troubleshooting"),
+        )
+    return orjson.dumps({"results": items[:10], "total": len(items)})
 
 
 @app.get("/api/v1/troubleshooting")
 async def list_troubleshooting(q: str | None = None, category: str | None = None):
-    items = DATA.get("troubleshooting", [])
-    if category:
-        items = [i for i in items if i.get("category") == category]
-    if q:
-        items = search_items(items, q, ["title", "symptoms", "causes", "tags"])
-    return {"results": items[:10], "total": len(items)}
+    return Response(_list_troubleshooting((q or "").lower(), category), media_type="application/json")
 
 
 @app.get("/api/v1/troubleshooting/{id}")
-async def get_troubleshooting_by_id(id: str):
-    item = find_by_id(DATA.get("troubleshooting", []), id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Not found")
-    return item
+async def get_troubleshooting_by_id(id: str, request: Request):
+    return item_response(request, "troubleshooting", id)
 
 
 @app.get("/api/v1/tips")
 async def list_tips(category: str | None = None):
-    items = DATA.get("tips", [])
-    if category:
-        items = [i for i in items if i.get("category") == category]
+    items = filter_items("tips", category=category)
     return {"results": items, "total": len(items)}
 
 
 @app.get("/api/v1/governance/{feature}")
 async def get_governance(feature: str):
-    feature_lower = feature.lower().replace(" ", "-").replace("_", "-")
-    for item in DATA.get("governance", []):
-        if item.get("feature") == feature_lower or feature_lower in item.get("feature", ""):
-            return item
-    for item in DATA.get("governance", []):
-        if feature_lower in item.get("display_name", "").lower():
-            return item
-    raise HTTPException(status_code=404, detail=f"No governance info for: {feature}")
+    item = find_governance(feature)
+    if not item:
+        raise HTTPException(status_code=404, detail=f"No governance info for: {feature}")
+    return item
 
 
 # ---------------------------------------------------------------------------
@@ -322,111 +616,108 @@ mcp = FastMCP(
 )
 
 
+@cached
+def _search_best_practices(query: str, category: str | None, difficulty: str | None) -> str:
+    items = filter_items("best_practices", category=category, difficulty=difficulty)
+    results = search_items(
+        items,
+        query,
+        SEARCH_FIELDS["best_practices"],
+        SEARCH_INDEX.get("best_practices"),
+    )
+    if not results:
+        return "No best practices found matching your query."
+    return "\n".join(
+        f"\n## {i}. {item['title']}\n"
+        f"**Description**: {item['description']}\n"
+        f"**Rationale**: {item.get('rationale', '')}\n"
+        f"*Difficulty: {item.get('difficulty', 'N/A')}*\n"
+        f"Resource URI: bestpractice://{item['id']}"
+        for i, item in enumerate(results[:5], 1)
+    )
+
+
 @mcp.tool()
 def search_best_practices(query: str, category: str | None = None, difficulty: str | None = None) -> str:
     """Search curated Copilot Studio best practices. Returns matching practices with title and rationale."""
-    items = DATA.get("best_practices", [])
-    if category:
-        items = [i for i in items if i.get("category") == category]
-    if difficulty:
-        items = [i for i in items if i.get("difficulty") == difficulty]
-    results = search_items(items, query, ["title", "description", "tags", "rationale"])
+    return _search_best_practices(query.lower(), category, difficulty)
+
+
+@cached
+def _get_code_snippet(query: str, language: str | None) -> str:
+    items = filter_items("snippets", language=language if language != "any" else None)
+    results = search_items(items, query, SEARCH_FIELDS["snippets"], SEARCH_INDEX.get("snippets"))
     if not results:
-        return "No best practices found matching your query."
-    lines = []
-    for i, item in enumerate(results[:5], 1):
-        lines.append(f"\n## {i}. {item['title']}")
-        lines.append(f"**Description**: {item['description']}")
-        lines.append(f"**Rationale**: {item.get('rationale', '')}")
-        lines.append(f"*Difficulty: {item.get('difficulty', 'N/A')}*")
-        lines.append(f"Resource URI: bestpractice://{item['id']}")
-    return "\n".join(lines)
+        return "No code snippets found matching your query."
+    return "\n".join(
+        f"\n## {item['title']}\n"
+        f"**Language**: {item.get('language', 'unknown')}\n"
+        f"**Use case**: {item.get('use_case', '')}\n"
+        f"\n```{item.get('language', '')}\n{item.get('code', '')}\n```\n"
+        f"\n**Explanation**: {item.get('explanation', '')}\n"
+        f"Resource URI: snippet://{item['id']}"
+        for item in results[:3]
+    )
 
 
 @mcp.tool()
 def get_code_snippet(query: str, language: str | None = None) -> str:
     """Get copy-paste ready code snippets for Copilot Studio. Supports power-fx, yaml, json, or any language."""
-    items = DATA.get("snippets", [])
-    if language and language != "any":
-        items = [i for i in items if i.get("language") == language]
-    results = search_items(items, query, ["title", "description", "use_case", "tags"])
-    if not results:
-        return "No code snippets found matching your query."
-    lines = []
-    for item in results[:3]:
-        lines.append(f"\n## {item['title']}")
-        lines.append(f"**Language**: {item.get('language', 'unknown')}")
-        lines.append(f"**Use case**: {item.get('use_case', '')}")
-        lines.append(f"\n```{item.get('language', '')}\n{item.get('code', '')}\n```")
-        lines.append(f"\n**Explanation**: {item.get('explanation', '')}")
-        lines.append(f"Resource URI: snippet://{item['id']}")
-    return "\n".join(lines)
+    return _get_code_snippet(query.lower(), language)
 
 
-@mcp.tool()
-def troubleshoot_issue(issue: str) -> str:
-    """Get step-by-step troubleshooting for Copilot Studio issues. Describe the problem or error message."""
-    results = search_items(DATA.get("troubleshooting", []), issue, ["title", "symptoms", "causes", "tags"])
+@cached
+def _troubleshoot_issue(issue: str) -> str:
+    results = search_items(
+        DATA.get("troubleshooting", []),
+        issue,
+        SEARCH_FIELDS["troubleshooting"],
+        SEARCH_INDEX.get("troubleshooting"),
+    )
     if not results:
         return "No troubleshooting guides found for this issue."
     item = results[0]
-    lines = [f"# {item['title']}"]
-    if item.get("symptoms"):
-        lines.append("\n**Symptoms**:")
-        for s in item["symptoms"]:
-            lines.append(f"- {s}")
-    if item.get("causes"):
-        lines.append("\n**Possible causes**:")
-        for c in item["causes"]:
-            lines.append(f"- {c}")
-    if item.get("steps"):
-        lines.append("\n**Resolution steps**:")
-        for step in item["steps"]:
-            lines.append(f"\n**Step {step['step']}**: {step['action']}")
-            lines.append(f"  {step['details']}")
-    lines.append(f"\nResource URI: troubleshooting://{item['id']}")
+    text = f"{FORMATTED['troubleshooting'][item['id']]}\n\nResource URI: troubleshooting://{item['id']}"
     if len(results) > 1:
-        lines.append("\n**Other related guides**:")
-        for other in results[1:3]:
-            lines.append(f"- {other['title']} (troubleshooting://{other['id']})")
-    return "\n".join(lines)
+        text += "\n\n**Other related guides**:" + "".join(
+            f"\n- {other['title']} (troubleshooting://{other['id']})" for other in results[1:3]
+        )
+    return text
+
+
+@mcp.tool()
+def troubleshoot_issue(issue: str) -> str:
+    """Get step-by-step troubleshooting for Copilot Studio issues. Describe the problem or error message."""
+    return _troubleshoot_issue(issue.lower())
 
 
 @mcp.tool()
 def get_tips_for_feature(feature: str) -> str:
     """Get tips and tricks for a specific Copilot Studio feature like topics, testing, authoring, etc."""
-    feature_lower = feature.lower()
-    results = [
-        t
-        for t in DATA.get("tips", [])
-        if feature_lower in t.get("category", "").lower()
-        or feature_lower in t.get("title", "").lower()
-        or feature_lower in " ".join(t.get("tags", [])).lower()
-    ]
+    results = find_tips(feature.lower())
     if not results:
         return f"No tips found for '{feature}'."
-    lines = []
-    for item in results[:5]:
-        lines.append(f"\n## {item['title']}")
-        lines.append(item.get("tip", ""))
-        if item.get("why_it_matters"):
-            lines.append(f"\n*Why it matters*: {item['why_it_matters']}")
-        lines.append(f"Resource URI: tip://{item['id']}")
-    return "\n".join(lines)
+    return "\n".join(
+        f"\n## {item['title']}\n{item.get('tip', '')}\n"
+        + (f"\n*Why it matters*: {item['why_it_matters']}\n" if item.get("why_it_matters") else "")
+        + f"Resource URI: tip://{item['id']}"
+        for item in results[:5]
+    )
+
+
+@cached
+def _check_governance_zone(feature: str) -> str:
+    result = find_governance(feature)
+    if not result:
+        return f"No governance information found for '{feature}'."
+    text = FORMATTED["governance"][normalize_feature(result["feature"])]
+    return text + f"\n\nResource URI: governance://{result['feature']}"
 
 
 @mcp.tool()
 def check_governance_zone(feature: str) -> str:
     """Check what governance zone is required for a Copilot Studio feature like http-connector, mcp-servers, etc."""
-    feature_lower = feature.lower().replace(" ", "-").replace("_", "-")
-    result = None
-    for item in DATA.get("governance", []):
-        if feature_lower in item.get("feature", "") or feature_lower in item.get("display_name", "").lower():
-            result = item
-            break
-    if not result:
-        return f"No governance information found for '{feature}'."
-    return format_governance_full(result) + f"\n\nResource URI: governance://{result['feature']}"
+    return _check_governance_zone(feature)
 
 
 # ---------------------------------------------------------------------------
@@ -437,39 +728,33 @@ def check_governance_zone(feature: str) -> str:
 @mcp.resource("bestpractice://{id}")
 def get_best_practice_resource(id: str) -> str:
     """Full best practice detail including description, rationale, examples, difficulty, and tags."""
-    item = find_by_id(DATA.get("best_practices", []), id)
-    return format_best_practice_full(item) if item else f"Best practice '{id}' not found."
+    return FORMATTED.get("best_practices", {}).get(id) or f"Best practice '{id}' not found."
 
 
 @mcp.resource("snippet://{id}")
 def get_snippet_resource(id: str) -> str:
     """Full code snippet with code block, explanation, and use case."""
-    item = find_by_id(DATA.get("snippets", []), id)
-    return format_snippet_full(item) if item else f"Snippet '{id}' not found."
+    return FORMATTED.get("snippets", {}).get(id) or f"Snippet '{id}' not found."
 
 
 @mcp.resource("troubleshooting://{id}")
 def get_troubleshooting_resource(id: str) -> str:
     """Full troubleshooting guide with symptoms, causes, and step-by-step resolution."""
-    item = find_by_id(DATA.get("troubleshooting", []), id)
-    return format_troubleshooting_full(item) if item else f"Troubleshooting guide '{id}' not found."
+    return FORMATTED.get("troubleshooting", {}).get(id) or f"Troubleshooting guide '{id}' not found."
 
 
 @mcp.resource("tip://{id}")
 def get_tip_resource(id: str) -> str:
     """Full tip with explanation and why it matters."""
-    item = find_by_id(DATA.get("tips", []), id)
-    return format_tip_full(item) if item else f"Tip '{id}' not found."
+    return FORMATTED.get("tips", {}).get(id) or f"Tip '{id}' not found."
 
 
 @mcp.resource("governance://{feature}")
 def get_governance_resource(feature: str) -> str:
     """Full governance zone information including availability per zone and justification template."""
-    feature_lower = feature.lower().replace(" ", "-").replace("_", "-")
-    for item in DATA.get("governance", []):
-        if item.get("feature") == feature_lower:
-            return format_governance_full(item)
-    return f"Governance info for '{feature}' not found."
+    return (
+        FORMATTED.get("governance", {}).get(normalize_feature(feature)) or f"Governance info for '{feature}' not found."
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -483,4 +768,10 @@ if __name__ == "__main__":
     import uvicorn
 
     port = int(os.getenv("PORT", "2011"))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Import string (not the app object) is required for workers > 1; each worker loads its own DATA
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=int(os.getenv("WEB_CONCURRENCY", "2")),
+    )
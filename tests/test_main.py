@@ -1,62 +1,117 @@
-import json
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 
+import orjson
 import pytest
+import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
-
-from main import DATA, app, find_by_id, load_json, mcp, search_items
-
-
-def parse_sse_json(text: str) -> dict:
-    """Parse SSE response and extract JSON from data lines."""
-    for line in text.split("\n"):
-        line = line.strip()
-        if line.startswith("data: "):
-            return json.loads(line[6:])
-    return {}
+from starlette.requests import Request
+from starlette.routing import Mount
+
+from main import (
+    BY_ID,
+    DATA,
+    DATA_FILES,
+    FORMATTED,
+    MCP_ACCEPT,
+    _search_best_practices,
+    app,
+    build_indexes,
+    build_search_index,
+    filter_items,
+    find_by_id,
+    find_tips,
+    format_best_practice_full,
+    index_candidates,
+    load_json,
+    mcp,
+    mcp_accept_middleware,
+    search_items,
+)
+
+
+def parse_sse_json(content: bytes) -> dict:
+    """Extract the JSON payload of the first SSE data line, without splitting the body into lines."""
+    start = content.find(b"data: ")
+    if start == -1:
+        return {}
+    end = content.find(b"\n", start)
+    return orjson.loads(content[start + 6 : end if end != -1 else None])
+
+
+@pytest.fixture(scope="session")
+def corpus():
+    """Read-only view of the parsed data files, loaded once per session (once per worker under pytest-xdist)."""
+    with ThreadPoolExecutor(max_workers=len(DATA_FILES)) as pool:
+        return MappingProxyType(dict(zip(DATA_FILES, pool.map(load_json, DATA_FILES.values()))))
 
 
 @pytest.fixture(autouse=True)
-def _load_data():
-    """Load test data before each test."""
-    DATA["best_practices"] = load_json("best_practices.json")
-    DATA["snippets"] = load_json("snippets.json")
-    DATA["troubleshooting"] = load_json("troubleshooting.json")
-    DATA["tips"] = load_json("tips.json")
-    DATA["governance"] = load_json("governance.json")
+def _load_data(corpus):
+    """Populate DATA from the pre-parsed corpus before each test — dict updates only, no file I/O."""
+    DATA.update(corpus)
+    build_indexes()
     yield
     DATA.clear()
 
 
+@pytest.fixture
+def deepcopy_data(corpus):
+    """DATA backed by a private deep copy of the corpus, for tests that mutate items. Indexes are rebuilt."""
+    DATA.update(copy.deepcopy(dict(corpus)))
+    build_indexes()
+    return DATA
+
+
 @pytest.fixture
 def api_key_headers():
     return {"X-API-Key": "mcs-bootcamp-2025"}
 
 
+MCP_HEADERS = {
+    "X-API-Key": "mcs-bootcamp-2025",
+    "Accept": "application/json, text/event-stream",
+    "Content-Type": "application/json",
+}
+
+MCP_INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": "1",
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-03-26",
+        "capabilities": {},
+        "clientInfo": {"name": "test", "version": "1.0"},
+    },
+}
+
+
 @pytest.fixture
 def mcp_headers():
-    return {
-        "X-API-Key": "mcs-bootcamp-2025",
-        "Accept": "application/json, text/event-stream",
-        "Content-Type": "application/json",
-    }
+    return dict(MCP_HEADERS)
 
 
-@pytest.fixture
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def client():
+    """One AsyncClient over the app for the whole session.
+
+    Shared state: tests must not set cookies, default headers or auth on it; pass per-request headers instead.
+    """
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test", follow_redirects=True) as c:
         yield c
 
 
-@pytest.fixture
+ORIGINAL_ROUTES = tuple(app.routes)
+NON_MCP_ROUTES = tuple(r for r in ORIGINAL_ROUTES if not (isinstance(r, Mount) and r.path == "/mcp"))
+
+
+@pytest_asyncio.fixture(scope="class", loop_scope="session")
 async def mcp_client():
-    """Client with fresh MCP ASGI app lifespan (session manager is single-use)."""
+    """Client with fresh MCP ASGI app lifespan, shared by one test class (session manager is single-use)."""
     fresh_mcp_app = mcp.http_app(path="/", stateless_http=True)
-    from starlette.routing import Mount
-
-    original_routes = list(app.routes)
-    app.routes[:] = [r for r in app.routes if not (isinstance(r, Mount) and r.path == "/mcp")]
-    app.routes.append(Mount("/mcp", app=fresh_mcp_app))
+    app.routes[:] = [*NON_MCP_ROUTES, Mount("/mcp", app=fresh_mcp_app)]
 
     ctx = fresh_mcp_app.lifespan(fresh_mcp_app)
     await ctx.__aenter__()
@@ -69,7 +124,15 @@ async def mcp_client():
             await ctx.__aexit__(None, None, None)
         except RuntimeError:
             pass  # anyio cancel scope teardown across tasks — harmless
-        app.routes[:] = original_routes
+        app.routes[:] = ORIGINAL_ROUTES
+
+
+@pytest_asyncio.fixture(scope="class", loop_scope="session")
+async def initialized_mcp_client(mcp_client):
+    """`mcp_client` that has already completed the initialize / initialized handshake."""
+    await mcp_client.post("/mcp", headers=MCP_HEADERS, json=MCP_INITIALIZE)
+    await mcp_client.post("/mcp", headers=MCP_HEADERS, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+    yield mcp_client
 
 
 # ---------------------------------------------------------------------------
@@ -114,12 +177,44 @@ class TestSearchItems:
         result = search_items(items, "error", ["title", "description"])
         assert result[0]["title"] == "Error handling"
 
+    def test_search_uses_precomputed_blobs(self):
+        items = [{"id": "1", "title": "Something"}]
+        result = search_items(items, "error", ["title"], build_search_index([("1", "precomputed error")]))
+        assert len(result) == 1
+
+    def test_search_scores_only_token_index_candidates(self):
+        items = [{"id": "1", "title": "Handle errors"}, {"id": "2", "title": "Error codes"}]
+        result = search_items(items, "error", ["title"], build_search_index([("1", "handle errors")]))
+        assert [r["id"] for r in result] == ["1"]
+
+    def test_search_does_not_match_across_list_values(self):
+        items = [{"title": "Item A", "tags": ["http", "api"]}]
+        assert search_items(items, "http api", ["tags"]) == []
+
+    def test_no_fields_matches_nothing(self):
+        items = [{"id": "1", "title": "error"}]
+        assert search_items(items, "error", []) == []
+
+    def test_search_caps_at_10_and_keeps_order_on_ties(self):
+        items = [{"title": f"error {i}", "id": str(i)} for i in range(15)]
+        items.append({"title": "error error", "id": "top"})
+        result = search_items(items, "error", ["title"])
+        assert [r["id"] for r in result] == ["top"] + [str(i) for i in range(9)]
+
     def test_no_matches_returns_empty(self):
         items = [{"title": "Something"}]
         result = search_items(items, "nonexistent", ["title"])
         assert len(result) == 0
 
 
+class TestLoadJson:
+    def test_parsed_once_per_file(self):
+        assert load_json("tips.json") is load_json("tips.json")
+
+    def test_missing_file_returns_empty_list(self):
+        assert load_json("does-not-exist.json") == []
+
+
 class TestFindById:
     def test_finds_existing(self):
         items = [{"id": "bp-001", "title": "Test"}]
@@ -129,6 +224,75 @@ class TestFindById:
         items = [{"id": "bp-001"}]
         assert find_by_id(items, "bp-999") is None
 
+    def test_uses_prebuilt_index(self):
+        by_id = {"bp-001": {"id": "bp-001", "title": "Indexed"}}
+        assert find_by_id([], "bp-001", by_id)["title"] == "Indexed"
+        assert find_by_id([], "bp-999", by_id) is None
+
+
+class TestIndexes:
+    def test_by_id_covers_every_item(self):
+        for name in ("best_practices", "snippets", "troubleshooting", "tips"):
+            assert BY_ID[name] == {item["id"]: item for item in DATA[name]}
+
+    def test_formatted_resources_precomputed(self):
+        assert FORMATTED["best_practices"]["bp-001"] == format_best_practice_full(BY_ID["best_practices"]["bp-001"])
+        assert "http-connector" in FORMATTED["governance"]
+
+    def test_filter_items_matches_linear_filter(self):
+        items = DATA["best_practices"]
+        category, difficulty = items[0]["category"], items[0]["difficulty"]
+        expected = [i for i in items if i["category"] == category and i["difficulty"] == difficulty]
+        assert filter_items("best_practices", category=category, difficulty=difficulty) == expected
+        assert filter_items("best_practices", category=None) is items
+        assert filter_items("snippets", language="nonexistent") == []
+
+    def test_rebuild_tracks_mutated_data(self, deepcopy_data, corpus):
+        item = deepcopy_data["best_practices"][0]
+        item["category"] = "rebuilt-category"
+        build_indexes()
+        assert filter_items("best_practices", category="rebuilt-category") == [item]
+        assert corpus["best_practices"][0]["category"] != "rebuilt-category"
+
+
+class TestTokenIndex:
+    def test_candidates_match_inside_tokens(self):
+        index = build_search_index([("a", "http connector"), ("b", "testing topics")])
+        assert index_candidates(index, "connect") == {"a"}
+        assert index_candidates(index, "nnect") == {"a"}
+        assert index_candidates(index, "topic test") == {"b"}
+        assert index_candidates(index, "missing") == set()
+
+    def test_query_tokens_are_memoized_per_index(self):
+        index = build_search_index([("a", "http connector")])
+        index_candidates(index, "http conn")
+        assert index.token_keys == {"http": {"a"}, "conn": {"a"}}
+        assert index_candidates(index, "conn") == {"a"}
+
+    def test_query_without_tokens_returns_none(self):
+        assert index_candidates(build_search_index([("a", "x")]), " - ") is None
+
+    def test_find_tips_matches_substring_in_corpus_order(self):
+        expected = [
+            t
+            for t in DATA["tips"]
+            if "test" in t["category"] or "test" in t["title"].lower() or "test" in " ".join(t["tags"]).lower()
+        ]
+        assert expected
+        assert find_tips("test") == expected
+
+
+class TestResultCache:
+    def test_repeated_query_hits_cache(self):
+        first = _search_best_practices("error", None, None)
+        assert _search_best_practices("error", None, None) is first
+        assert _search_best_practices.cache_info().hits >= 1
+
+    def test_build_indexes_clears_cache(self):
+        _search_best_practices("error", None, None)
+        build_indexes()
+        assert _search_best_practices.cache_info().currsize == 0
+
 
 # ---------------------------------------------------------------------------
 # REST API tests
@@ -141,6 +305,7 @@ class TestHealth:
         assert resp.status_code == 200
         data = resp.json()
         assert data["status"] == "healthy"
+        assert data["data_loaded"] is True
 
     async def test_health_with_auth_also_works(self, client, api_key_headers):
         resp = await client.get("/health", headers=api_key_headers)
@@ -156,10 +321,40 @@ class TestAuth:
         resp = await client.get("/api/v1/best-practices", headers={"X-API-Key": "wrong"})
         assert resp.status_code == 401
 
+    async def test_key_prefix_returns_401(self, client, api_key_headers):
+        resp = await client.get("/api/v1/best-practices", headers={"X-API-Key": api_key_headers["X-API-Key"][:-1]})
+        assert resp.status_code == 401
+
     async def test_valid_key_passes(self, client, api_key_headers):
         resp = await client.get("/api/v1/best-practices", headers=api_key_headers)
         assert resp.status_code == 200
 
+    async def test_no_keys_configured_disables_auth(self, client, monkeypatch):
+        monkeypatch.setattr("main.API_KEYS", frozenset())
+        resp = await client.get("/api/v1/best-practices")
+        assert resp.status_code == 200
+
+
+class TestCORS:
+    async def test_preflight_allows_api_key_header(self, client):
+        resp = await client.options(
+            "/api/v1/best-practices",
+            headers={
+                "Origin": "https://example.com",
+                "Access-Control-Request-Method": "GET",
+                "Access-Control-Request-Headers": "X-API-Key",
+            },
+        )
+        assert resp.status_code == 200
+        assert "x-api-key" in resp.headers["access-control-allow-headers"].lower()
+
+    async def test_preflight_rejects_unlisted_method(self, client):
+        resp = await client.options(
+            "/api/v1/best-practices",
+            headers={"Origin": "https://example.com", "Access-Control-Request-Method": "DELETE"},
+        )
+        assert resp.status_code == 400
+
 
 class TestBestPractices:
     async def test_list_all(self, client, api_key_headers):
@@ -187,11 +382,33 @@ class TestBestPractices:
         for item in data["results"]:
             assert item["difficulty"] == "beginner"
 
+    async def test_list_is_gzip_compressed(self, client, api_key_headers):
+        resp = await client.get("/api/v1/best-practices", headers={**api_key_headers, "Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert len(resp.json()["results"]) > 0
+
+    async def test_filter_category_and_difficulty(self, client, api_key_headers):
+        resp = await client.get("/api/v1/best-practices?category=topics&difficulty=beginner", headers=api_key_headers)
+        data = resp.json()
+        assert data["results"]
+        for item in data["results"]:
+            assert item["category"] == "topics"
+            assert item["difficulty"] == "beginner"
+
     async def test_get_by_id(self, client, api_key_headers):
         resp = await client.get("/api/v1/best-practices/bp-001", headers=api_key_headers)
         assert resp.status_code == 200
         assert resp.json()["id"] == "bp-001"
 
+    async def test_get_by_id_etag_not_modified(self, client, api_key_headers):
+        resp = await client.get("/api/v1/best-practices/bp-001", headers=api_key_headers)
+        tag = resp.headers["etag"]
+        resp = await client.get("/api/v1/best-practices/bp-001", headers={**api_key_headers, "If-None-Match": tag})
+        assert resp.status_code == 304
+        assert resp.headers["etag"] == tag
+        resp = await client.get("/api/v1/best-practices/bp-002", headers={**api_key_headers, "If-None-Match": tag})
+        assert resp.status_code == 200
+
     async def test_get_by_id_not_found(self, client, api_key_headers):
         resp = await client.get("/api/v1/best-practices/bp-999", headers=api_key_headers)
         assert resp.status_code == 404
@@ -233,6 +450,17 @@ class TestTroubleshooting:
         resp = await client.get("/api/v1/troubleshooting/ts-001", headers=api_key_headers)
         assert resp.status_code == 200
 
+    async def test_gzip_detail_etag_is_weak_and_revalidates(self, client, api_key_headers):
+        gzip_headers = {**api_key_headers, "Accept-Encoding": "gzip"}
+        resp = await client.get("/api/v1/troubleshooting/ts-001", headers=gzip_headers)
+        assert resp.headers["content-encoding"] == "gzip"
+        tag = resp.headers["etag"]
+        assert tag.startswith('W/"')
+        resp = await client.get("/api/v1/troubleshooting/ts-001", headers={**gzip_headers, "If-None-Match": tag})
+        assert resp.status_code == 304
+        assert resp.headers["etag"] == tag
+        assert "Accept-Encoding" in resp.headers["vary"]
+
 
 class TestTips:
     async def test_list_all(self, client, api_key_headers):
@@ -258,6 +486,26 @@ class TestGovernance:
         assert resp.status_code == 200
         assert "mcp" in resp.json()["feature"]
 
+    async def test_get_feature_by_display_name_prefix(self, client, api_key_headers):
+        resp = await client.get("/api/v1/governance/SharePoint", headers=api_key_headers)
+        assert resp.status_code == 200
+        assert resp.json()["feature"] == "sharepoint-knowledge"
+
+    async def test_get_feature_substring_fallback(self, client, api_key_headers):
+        resp = await client.get("/api/v1/governance/connector", headers=api_key_headers)
+        assert resp.status_code == 200
+        assert resp.json()["feature"] == "http-connector"
+
+    async def test_get_feature_substring_across_separator(self, client, api_key_headers):
+        resp = await client.get("/api/v1/governance/p-conn", headers=api_key_headers)
+        assert resp.status_code == 200
+        assert resp.json()["feature"] == "http-connector"
+
+    async def test_get_feature_normalizes_separators(self, client, api_key_headers):
+        resp = await client.get("/api/v1/governance/MCP_Servers", headers=api_key_headers)
+        assert resp.status_code == 200
+        assert resp.json()["feature"] == "mcp-servers"
+
     async def test_not_found(self, client, api_key_headers):
         resp = await client.get("/api/v1/governance/nonexistent-feature", headers=api_key_headers)
         assert resp.status_code == 404
@@ -268,76 +516,54 @@ class TestGovernance:
 # ---------------------------------------------------------------------------
 
 
+@pytest.mark.xdist_group("mcp")  # keeps the class on one worker so mcp_client's route swap is set up once
 class TestMCPEndpoint:
     async def test_mcp_requires_auth(self, mcp_client):
         resp = await mcp_client.post(
-            "/mcp",
-            headers={"Accept": "application/json, text/event-stream"},
-            json={
-                "jsonrpc": "2.0",
-                "id": "1",
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2025-03-26",
-                    "capabilities": {},
-                    "clientInfo": {"name": "test", "version": "1.0"},
-                },
-            },
+            "/mcp", headers={"Accept": "application/json, text/event-stream"}, json=MCP_INITIALIZE
         )
         assert resp.status_code == 401
 
     async def test_mcp_initialize(self, mcp_client, mcp_headers):
-        resp = await mcp_client.post(
-            "/mcp",
-            headers=mcp_headers,
-            json={
-                "jsonrpc": "2.0",
-                "id": "1",
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2025-03-26",
-                    "capabilities": {},
-                    "clientInfo": {"name": "test", "version": "1.0"},
-                },
-            },
-        )
+        resp = await mcp_client.post("/mcp", headers=mcp_headers, json=MCP_INITIALIZE)
         assert resp.status_code == 200
-        data = parse_sse_json(resp.text)
+        data = parse_sse_json(resp.content)
         assert data.get("jsonrpc") == "2.0"
         result = data.get("result", {})
         assert "serverInfo" in result
         assert "capabilities" in result
 
-    async def test_mcp_tools_list(self, mcp_client, mcp_headers):
-        # Initialize first
-        await mcp_client.post(
-            "/mcp",
-            headers=mcp_headers,
-            json={
-                "jsonrpc": "2.0",
-                "id": "1",
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2025-03-26",
-                    "capabilities": {},
-                    "clientInfo": {"name": "test", "version": "1.0"},
-                },
-            },
-        )
-        # Send initialized notification
-        await mcp_client.post(
-            "/mcp",
-            headers=mcp_headers,
-            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
-        )
-        # List tools
+    async def test_mcp_injects_missing_accept_header(self, mcp_client, api_key_headers):
         resp = await mcp_client.post(
+            "/mcp", headers={**api_key_headers, "Content-Type": "application/json"}, json=MCP_INITIALIZE
+        )
+        assert resp.status_code == 200
+        assert parse_sse_json(resp.content).get("result", {}).get("serverInfo")
+
+    @pytest.mark.parametrize(
+        "headers",
+        [((b"content-type", b"application/json"),), ((b"accept", b"*/*"), (b"content-type", b"application/json"))],
+    )
+    async def test_mcp_accept_middleware_replaces_tuple_headers(self, headers):
+        scope = {"type": "http", "method": "POST", "path": "/mcp", "headers": headers}
+        seen = {}
+
+        async def call_next(request):
+            seen["headers"] = request.scope["headers"]
+
+        await mcp_accept_middleware(Request(scope), call_next)
+        assert headers[-1] == (b"content-type", b"application/json")  # caller's headers untouched
+        assert (b"accept", MCP_ACCEPT) in seen["headers"]
+        assert (b"content-type", b"application/json") in seen["headers"]
+
+    async def test_mcp_tools_list(self, initialized_mcp_client, mcp_headers):
+        resp = await initialized_mcp_client.post(
             "/mcp",
             headers=mcp_headers,
             json={"jsonrpc": "2.0", "id": "2", "method": "tools/list", "params": {}},
         )
         assert resp.status_code == 200
-        data = parse_sse_json(resp.text)
+        data = parse_sse_json(resp.content)
         tools = data.get("result", {}).get("tools", [])
         tool_names = [t["name"] for t in tools]
         assert "search_best_practices" in tool_names
@@ -347,29 +573,8 @@ class TestMCPEndpoint:
         assert "check_governance_zone" in tool_names
         assert len(tools) == 5
 
-    async def test_mcp_tool_call(self, mcp_client, mcp_headers):
-        # Initialize
-        await mcp_client.post(
-            "/mcp",
-            headers=mcp_headers,
-            json={
-                "jsonrpc": "2.0",
-                "id": "1",
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2025-03-26",
-                    "capabilities": {},
-                    "clientInfo": {"name": "test", "version": "1.0"},
-                },
-            },
-        )
-        await mcp_client.post(
-            "/mcp",
-            headers=mcp_headers,
-            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
-        )
-        # Call tool
-        resp = await mcp_client.post(
+    async def test_mcp_tool_call(self, initialized_mcp_client, mcp_headers):
+        resp = await initialized_mcp_client.post(
             "/mcp",
             headers=mcp_headers,
             json={
@@ -380,7 +585,7 @@ class TestMCPEndpoint:
             },
         )
         assert resp.status_code == 200
-        data = parse_sse_json(resp.text)
+        data = parse_sse_json(resp.content)
         content = data.get("result", {}).get("content", [])
         assert len(content) > 0
         assert content[0]["type"] == "text"